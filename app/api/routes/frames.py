@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import Response
+import asyncio
 import base64
+import struct
 
 from app.services.video_service import video_service
 from app.services.frame_service import frame_service
@@ -19,7 +21,9 @@ async def get_preview_frame(
     if not video_path:
         raise HTTPException(status_code=404, detail="Video not found")
 
-    frame_data = frame_service.get_preview_frame(str(video_path), t)
+    frame_data = await asyncio.to_thread(
+        frame_service.get_preview_frame, str(video_path), t
+    )
     if not frame_data:
         raise HTTPException(status_code=500, detail="Failed to extract frame")
 
@@ -37,7 +41,9 @@ async def get_full_frame(
     if not video_path:
         raise HTTPException(status_code=404, detail="Video not found")
 
-    frame_data = frame_service.get_full_frame(str(video_path), t)
+    frame_data = await asyncio.to_thread(
+        frame_service.get_full_frame, str(video_path), t
+    )
     if not frame_data:
         raise HTTPException(status_code=500, detail="Failed to extract frame")
 
@@ -49,22 +55,48 @@ async def get_thumbnails(
     base: str = Query(..., description="Base path identifier"),
     path: str = Query(..., description="Video file path"),
     count: int = Query(20, description="Number of thumbnails", ge=1, le=100),
+    format: str = Query(
+        "base64", description="Response format", pattern="^(binary|base64)$"
+    ),
 ):
-    """Get evenly-spaced thumbnail frames for the slider preview."""
+    """
+    Get evenly-spaced thumbnail frames for the slider preview.
+    Defaults to the base64 JSON list older clients expect; the binary
+    format is a little-endian header (uint32 count, float64 duration)
+    followed by each JPEG prefixed with its uint32 length.
+    """
     video_path = video_service.get_full_path(base, path)
     if not video_path:
         raise HTTPException(status_code=404, detail="Video not found")
 
-    # Get video duration
-    info = video_service.get_video_info(base, path)
+    # Duration and thumbnails come from one open container where possible
+    probed = await asyncio.to_thread(
+        frame_service.get_thumbnails_with_info, str(video_path), count
+    )
+    if probed:
+        info, thumbnails = probed
+    else:
+        info = await asyncio.to_thread(video_service.get_video_info, base, path)
+        thumbnails = None
+
     if not info or info.get("duration", 0) <= 0:
         raise HTTPException(
             status_code=400, detail="Could not determine video duration"
         )
 
-    thumbnails = frame_service.get_thumbnails(str(video_path), info["duration"], count)
+    if thumbnails is None:
+        thumbnails = await asyncio.to_thread(
+            frame_service.get_thumbnails, str(video_path), info["duration"], count
+        )
+
+    if format == "binary":
+        parts = [struct.pack("<Id", len(thumbnails), info["duration"])]
+        for thumb in thumbnails:
+            parts.append(struct.pack("<I", len(thumb)))
+            parts.append(thumb)
+        return Response(content=b"".join(parts), media_type="application/octet-stream")
 
-    # Return as base64 encoded list for easy frontend consumption
+    # Base64 encoded list kept for older clients
     return {
         "count": len(thumbnails),
         "duration": info["duration"],
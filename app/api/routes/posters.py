@@ -1,7 +1,8 @@
+import asyncio
 import logging
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import List, Dict, Optional
+from typing import List, Dict, Literal, Optional
 
 from app.services.poster_service import poster_service
 
@@ -52,13 +53,16 @@ class PosterGenerateRequest(BaseModel):
     textLayers: List[TextLayer] = []
     lineElements: List[LineElement] = []
     filename: str
+    format: Literal["png", "webp"] = "png"
 
 
 @router.post("/generate")
 async def generate_poster(request: PosterGenerateRequest):
     """Generate and save a poster based on the provided configuration."""
     try:
-        output_filename = poster_service.generate_poster(
+        # Rendering and encoding are CPU-bound; keep them off the event loop
+        output_filename = await asyncio.to_thread(
+            poster_service.generate_poster,
             background_mode=request.backgroundMode,
             background_color=request.backgroundColor,
             gradient_colors=request.gradientColors,
@@ -73,6 +77,7 @@ async def generate_poster(request: PosterGenerateRequest):
             text_layers=[layer.model_dump() for layer in request.textLayers],
             line_elements=[elem.model_dump() for elem in request.lineElements],
             filename=request.filename,
+            output_format=request.format,
         )
 
         return {
@@ -1,3 +1,4 @@
+from functools import cached_property
 from pydantic_settings import BaseSettings
 from typing import List
 from pathlib import Path
@@ -11,6 +12,9 @@ class Settings(BaseSettings):
     preview_max_width: int = 640
     thumbnail_quality: int = 85
 
+    # FFmpeg hardware decoding ("auto", a specific method like "cuda", or "none")
+    ffmpeg_hwaccel: str = "auto"
+
     # Poster dimensions (Plex standard)
     poster_width: int = 1000
     poster_height: int = 1500
@@ -27,9 +31,9 @@ class Settings(BaseSettings):
         ".flv",
     ]
 
-    @property
+    @cached_property
     def video_paths_list(self) -> List[Path]:
-        """Parse comma-separated video paths into list of Path objects."""
+        """Parse comma-separated video paths into list of Path objects (cached)."""
         paths = []
         for p in self.video_paths.split(","):
             p = p.strip()
@@ -39,6 +43,10 @@ class Settings(BaseSettings):
                     paths.append(path)
         return paths
 
+    def refresh_paths(self):
+        """Re-check video paths on next access (e.g. after mounting a new source)."""
+        self.__dict__.pop("video_paths_list", None)
+
     class Config:
         env_file = ".env"
 
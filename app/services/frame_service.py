@@ -1,8 +1,19 @@
 import hashlib
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, List
+from typing import Any, Dict, Optional, List, Tuple
+import av
+import numpy as np
 from app.config import settings
-from app.utils.ffmpeg_utils import extract_frame, extract_frame_high_quality
+from app.utils.ffmpeg_utils import (
+    extract_frame,
+    extract_frame_array,
+    extract_frame_high_quality,
+    extract_frames_batch,
+    extract_frames_parallel,
+    get_frame_extractor,
+)
 
 
 class FrameService:
@@ -13,16 +24,18 @@ class FrameService:
         self.preview_width = settings.preview_max_width
         self.thumbnail_quality = settings.thumbnail_quality
 
+        # In-memory LRU index of cached frames (cache key -> size in bytes)
+        self._lock = threading.Lock()
+        self._lru: OrderedDict[str, int] = OrderedDict()
+        self._total_bytes = 0
+        self._load_cache_index()
+
     def get_preview_frame(self, video_path: str, timestamp: float) -> Optional[bytes]:
         """Get a preview-quality frame (cached)."""
-        cache_key = self._cache_key(
-            video_path, timestamp, self.preview_width, self.thumbnail_quality
-        )
-        cache_path = self.cache_dir / f"{cache_key}.jpg"
-
         # Return cached if exists
-        if cache_path.exists():
-            return cache_path.read_bytes()
+        cached = self._read_cached(video_path, timestamp)
+        if cached:
+            return cached
 
         # Extract frame
         frame_data = extract_frame(
@@ -34,62 +47,223 @@ class FrameService:
 
         if frame_data:
             # Cache the result
-            cache_path.write_bytes(frame_data)
+            self._write_cached(video_path, timestamp, frame_data)
             self._enforce_cache_limit()
             return frame_data
 
         return None
 
     def get_full_frame(self, video_path: str, timestamp: float) -> Optional[bytes]:
-        """Get a full-quality frame (not cached due to size)."""
+        """Get a full-quality PNG frame (encoded per call from the cached pixels)."""
         return extract_frame_high_quality(video_path, timestamp)
 
+    def get_full_frame_array(
+        self, video_path: str, timestamp: float
+    ) -> Optional[np.ndarray]:
+        """Get full-quality frame pixels as an RGB array (kept in a small LRU)."""
+        return extract_frame_array(video_path, timestamp)
+
     def get_thumbnails(
         self, video_path: str, duration: float, count: int = 20
     ) -> List[bytes]:
         """Generate evenly-spaced thumbnail frames for the slider."""
-        thumbnails = []
-        if duration <= 0 or count <= 0:
-            return thumbnails
+        timestamps = self._thumbnail_timestamps(duration, count)
 
+        # Serve what we can from cache, collect the rest for one batched extract
+        frames = self._read_cached_thumbnails(video_path, timestamps)
+        missing = [t for t in timestamps if t not in frames]
+
+        if missing:
+            batch = extract_frames_batch(
+                video_path,
+                missing,
+                width=self.preview_width,
+                quality=self.thumbnail_quality,
+                # Thumbnails only need a nearby frame; keyframes decode fastest
+                precise=False,
+            )
+            if not batch:
+                # Fall back to one FFmpeg process per frame, run concurrently
+                batch = extract_frames_parallel(
+                    video_path,
+                    missing,
+                    width=self.preview_width,
+                    quality=self.thumbnail_quality,
+                    precise=False,
+                )
+            self._cache_thumbnails(video_path, missing, batch, frames)
+
+        return [frames[t] for t in timestamps if t in frames]
+
+    def get_thumbnails_with_info(
+        self, video_path: str, count: int = 20
+    ) -> Optional[Tuple[Dict[str, Any], List[bytes]]]:
+        """
+        Get video metadata and slider thumbnails from one open container.
+        Returns None if PyAV can't open the video; use get_video_info and
+        get_thumbnails then.
+        """
+        try:
+            with get_frame_extractor(video_path) as extractor:
+                info = extractor.info()
+                timestamps = self._thumbnail_timestamps(info["duration"], count)
+
+                # Only decode the thumbnails that aren't cached yet;
+                # extract_frame checks out the same (already open) extractor
+                frames = self._read_cached_thumbnails(video_path, timestamps)
+                missing = [t for t in timestamps if t not in frames]
+                extracted = [
+                    extract_frame(
+                        video_path,
+                        timestamp,
+                        width=self.preview_width,
+                        quality=self.thumbnail_quality,
+                        precise=False,
+                    )
+                    for timestamp in missing
+                ]
+        except (av.FFmpegError, OSError, ValueError):
+            return None
+
+        self._cache_thumbnails(video_path, missing, extracted, frames)
+        return info, [frames[t] for t in timestamps if t in frames]
+
+    def _thumbnail_timestamps(self, duration: float, count: int) -> List[float]:
+        """Evenly-spaced thumbnail timestamps over a video's duration."""
+        if duration <= 0 or count <= 0:
+            return []
         interval = duration / count
-        for i in range(count):
-            timestamp = i * interval
-            frame = self.get_preview_frame(video_path, timestamp)
-            if frame:
-                thumbnails.append(frame)
+        return [i * interval for i in range(count)]
 
-        return thumbnails
+    def _read_cached_thumbnails(
+        self, video_path: str, timestamps: List[float]
+    ) -> Dict[float, bytes]:
+        """Read the cached thumbnails among the timestamps."""
+        frames = {}
+        for timestamp in timestamps:
+            cached = self._read_cached(video_path, timestamp, precise=False)
+            if cached:
+                frames[timestamp] = cached
+        return frames
 
-    def _cache_key(
-        self, video_path: str, timestamp: float, width: int, quality: int
+    def _cache_thumbnails(
+        self,
+        video_path: str,
+        timestamps: List[float],
+        extracted: List[Optional[bytes]],
+        frames: Dict[float, bytes],
+    ):
+        """Cache extracted thumbnails and add them to frames."""
+        for timestamp, frame_data in zip(timestamps, extracted):
+            if frame_data:
+                self._write_cached(video_path, timestamp, frame_data, precise=False)
+                frames[timestamp] = frame_data
+        self._enforce_cache_limit()
+
+    def _cache_path(self, cache_key: str) -> Path:
+        """Get the cache file path for a cache key."""
+        return self.cache_dir / f"{cache_key}.jpg"
+
+    def _preview_cache_key(
+        self, video_path: str, timestamp: float, precise: bool = True
     ) -> str:
-        """Generate cache key for a frame."""
-        key_str = f"{video_path}:{timestamp:.3f}:{width}:{quality}"
-        return hashlib.md5(key_str.encode()).hexdigest()
+        """Generate cache key for a preview frame."""
+        return self._cache_key(
+            video_path, timestamp, self.preview_width, self.thumbnail_quality, precise
+        )
+
+    def _read_cached(
+        self, video_path: str, timestamp: float, precise: bool = True
+    ) -> Optional[bytes]:
+        """Read a cached preview frame and mark it as recently used."""
+        cache_key = self._preview_cache_key(video_path, timestamp, precise)
+        with self._lock:
+            if cache_key not in self._lru:
+                return None
+            self._lru.move_to_end(cache_key)
 
-    def _enforce_cache_limit(self):
-        """Remove oldest cached frames if cache exceeds limit."""
         try:
-            files = sorted(
-                self.cache_dir.glob("*.jpg"), key=lambda p: p.stat().st_mtime
-            )
-            total_size = sum(f.stat().st_size for f in files)
+            return self._cache_path(cache_key).read_bytes()
+        except (OSError, IOError):
+            # File was removed behind our back; drop it from the index unless
+            # another thread has written it again in the meantime
+            with self._lock:
+                if not self._cache_path(cache_key).exists():
+                    size = self._lru.pop(cache_key, None)
+                    if size is not None:
+                        self._total_bytes -= size
+            return None
 
-            while total_size > self.max_cache_bytes and files:
-                oldest = files.pop(0)
-                total_size -= oldest.stat().st_size
-                oldest.unlink()
+    def _write_cached(
+        self,
+        video_path: str,
+        timestamp: float,
+        frame_data: bytes,
+        precise: bool = True,
+    ):
+        """Write a preview frame to the cache and record it in the index."""
+        cache_key = self._preview_cache_key(video_path, timestamp, precise)
+        try:
+            self._cache_path(cache_key).write_bytes(frame_data)
         except (OSError, IOError):
-            pass
+            return
 
-    def clear_cache(self):
-        """Clear all cached frames."""
+        with self._lock:
+            self._total_bytes -= self._lru.pop(cache_key, 0)
+            self._lru[cache_key] = len(frame_data)
+            self._total_bytes += len(frame_data)
+
+    def _load_cache_index(self):
+        """Build the LRU index from frames already on disk (oldest first)."""
         try:
+            entries = []
             for f in self.cache_dir.glob("*.jpg"):
-                f.unlink()
+                stat = f.stat()
+                entries.append((stat.st_mtime, f.stem, stat.st_size))
         except (OSError, IOError):
-            pass
+            return
+
+        with self._lock:
+            for _, cache_key, size in sorted(entries):
+                self._lru[cache_key] = size
+                self._total_bytes += size
+
+    def _cache_key(
+        self,
+        video_path: str,
+        timestamp: float,
+        width: int,
+        quality: int,
+        precise: bool = True,
+    ) -> str:
+        """Generate cache key for a frame."""
+        # Keyframe thumbnails and exact previews of one timestamp differ
+        seek = "exact" if precise else "keyframe"
+        key_str = f"{video_path}:{timestamp:.3f}:{width}:{quality}:{seek}"
+        # Not security sensitive; BLAKE2b is faster than MD5 on short keys
+        return hashlib.blake2b(key_str.encode(), digest_size=16).hexdigest()
+
+    def _enforce_cache_limit(self):
+        """Remove least recently used frames if cache exceeds limit."""
+        with self._lock:
+            while self._total_bytes > self.max_cache_bytes and self._lru:
+                cache_key, size = self._lru.popitem(last=False)
+                self._total_bytes -= size
+                try:
+                    self._cache_path(cache_key).unlink(missing_ok=True)
+                except (OSError, IOError):
+                    pass
+
+    def clear_cache(self):
+        """Clear all cached frames."""
+        with self._lock:
+            self._lru.clear()
+            self._total_bytes = 0
+            try:
+                for f in self.cache_dir.glob("*.jpg"):
+                    f.unlink()
+            except (OSError, IOError):
+                pass
 
 
 frame_service = FrameService()
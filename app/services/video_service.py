@@ -1,5 +1,9 @@
+import os
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from app.config import settings
 from app.utils.ffmpeg_utils import get_video_info
 
@@ -8,10 +12,25 @@ class VideoService:
     def __init__(self):
         self.video_extensions = set(settings.video_extensions)
 
+        # Listing cache (LRU): path -> (directory signature, cached at, videos)
+        self.list_cache_ttl = 5.0
+        self.list_cache_size = 32
+        self._list_lock = threading.Lock()
+        self._list_cache: OrderedDict[Optional[str], Tuple[tuple, float, list]] = (
+            OrderedDict()
+        )
+
     def list_videos(self, path: Optional[str] = None) -> List[Dict[str, Any]]:
-        """List all video files from configured paths."""
-        videos = []
+        """List all video files from configured paths (briefly cached)."""
+        if not path:
+            # Browsing from the top: once the cached listing has expired,
+            # pick up sources mounted since startup
+            with self._list_lock:
+                cached = self._list_cache.get(path)
+            if not cached or time.monotonic() - cached[1] >= self.list_cache_ttl:
+                settings.refresh_paths()
 
+        search_paths = []
         for base_path in settings.video_paths_list:
             if path:
                 # Browse specific subdirectory
@@ -20,13 +39,43 @@ class VideoService:
                     continue
             else:
                 search_path = base_path
+            search_paths.append((search_path, base_path))
 
+        # Reuse a recent listing if none of the scanned directories changed
+        signature = self._directory_signature(search_paths)
+        with self._list_lock:
+            cached = self._list_cache.get(path)
+            if (
+                cached
+                and cached[0] == signature
+                and time.monotonic() - cached[1] < self.list_cache_ttl
+            ):
+                self._list_cache.move_to_end(path)
+                return cached[2]
+
+        videos = []
+        for search_path, base_path in search_paths:
             videos.extend(self._scan_directory(search_path, base_path))
 
         # Sort by name
         videos.sort(key=lambda x: x["name"].lower())
+        with self._list_lock:
+            self._list_cache[path] = (signature, time.monotonic(), videos)
+            self._list_cache.move_to_end(path)
+            while len(self._list_cache) > self.list_cache_size:
+                self._list_cache.popitem(last=False)
         return videos
 
+    def _directory_signature(self, search_paths: List[Tuple[Path, Path]]) -> tuple:
+        """Build a cheap change signature from the scanned directories' mtimes."""
+        signature = []
+        for search_path, _ in search_paths:
+            try:
+                signature.append((str(search_path), search_path.stat().st_mtime_ns))
+            except OSError:
+                signature.append((str(search_path), None))
+        return tuple(signature)
+
     def _scan_directory(self, dir_path: Path, base_path: Path) -> List[Dict[str, Any]]:
         """Scan a directory for video files and subdirectories."""
         items = []
@@ -35,38 +84,53 @@ class VideoService:
             return items
 
         try:
-            for item in dir_path.iterdir():
-                if item.is_dir():
-                    # Check if directory contains any videos
-                    has_videos = any(
-                        f.suffix.lower() in self.video_extensions
-                        for f in item.rglob("*")
-                        if f.is_file()
-                    )
-                    if has_videos:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        # Include directory only if it contains any videos
+                        if self._has_video(entry.path):
+                            items.append(
+                                {
+                                    "name": entry.name,
+                                    "path": os.path.relpath(entry.path, base_path),
+                                    "type": "directory",
+                                    "base": str(base_path),
+                                }
+                            )
+                    elif entry.is_file() and self._is_video(entry.name):
                         items.append(
                             {
-                                "name": item.name,
-                                "path": str(item.relative_to(base_path)),
-                                "type": "directory",
+                                "name": entry.name,
+                                "path": os.path.relpath(entry.path, base_path),
+                                "type": "video",
                                 "base": str(base_path),
+                                "size": entry.stat().st_size,
                             }
                         )
-                elif item.is_file() and item.suffix.lower() in self.video_extensions:
-                    items.append(
-                        {
-                            "name": item.name,
-                            "path": str(item.relative_to(base_path)),
-                            "type": "video",
-                            "base": str(base_path),
-                            "size": item.stat().st_size,
-                        }
-                    )
         except PermissionError:
             pass
 
         return items
 
+    def _has_video(self, dir_path: str) -> bool:
+        """Check if a directory tree contains a video, stopping at the first one."""
+        stack = [dir_path]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file() and self._is_video(entry.name):
+                            return True
+            except OSError:
+                continue
+        return False
+
+    def _is_video(self, filename: str) -> bool:
+        """Check if a filename has a supported video extension."""
+        return os.path.splitext(filename)[1].lower() in self.video_extensions
+
     def get_video_info(self, base: str, path: str) -> Optional[Dict[str, Any]]:
         """Get detailed video metadata."""
         video_path = Path(base) / path
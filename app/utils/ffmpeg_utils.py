@@ -1,40 +1,147 @@
+import fcntl
+import io
+import mmap
+import os
+import re
+import shutil
 import subprocess
-import json
-from typing import Optional, Dict, Any
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Optional, Dict, Any, Iterator, List, Tuple
+
+import av
+import numpy as np
+import orjson
+from PIL import Image
+
+from app.config import settings
+
+# Absolute binary paths, resolved once. Together with close_fds=False (our own
+# descriptors are non-inheritable anyway) this lets subprocess launch FFmpeg
+# with posix_spawn instead of fork + exec
+FFMPEG = shutil.which("ffmpeg") or "ffmpeg"
+FFPROBE = shutil.which("ffprobe") or "ffprobe"
+
+JPEG_SOI = b"\xff\xd8"
+JPEG_EOI = b"\xff\xd9"
+
+# Max inputs opened by one batched FFmpeg process (each has its own demuxer
+# and decoder, so very large batches are split across a few processes)
+BATCH_MAX_INPUTS = 25
+
+# Pipe and initial read buffer sizes for FFmpeg output
+PIPE_BUFFER_SIZE = 1 << 20
+JPEG_BUFFER_SIZE = 256 << 10
+FRAME_BUFFER_SIZE = 4 << 20
+
+# Full-size frames are written to RAM-backed files here rather than piped
+SHM_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+# Binary PPM header: magic, width, height, max value, one whitespace byte
+PPM_HEADER = re.compile(rb"P6\s+(\d+)\s+(\d+)\s+(\d+)\s")
+
+# Bound how much of a file is read to detect stream properties when probing
+# metadata (FFmpeg defaults to 5MB / 5s); container headers carry what we need
+PROBE_SIZE = "500K"
+PROBE_ANALYZE_DURATION = "500K"  # microseconds
+PROBE_OPTIONS = {"probesize": PROBE_SIZE, "analyzeduration": PROBE_ANALYZE_DURATION}
+
+# Number of videos kept open by get_frame_extractor
+MAX_OPEN_EXTRACTORS = 4
+
+# In-memory caches of extracted frames (full-quality frames are large)
+FRAME_CACHE_SIZE = 64
+FULL_FRAME_CACHE_SIZE = 8
+
+# Frame rates as reported by ffprobe's r_frame_rate, for the common cases
+COMMON_FPS = {
+    "24/1": 24.0,
+    "25/1": 25.0,
+    "30/1": 30.0,
+    "50/1": 50.0,
+    "60/1": 60.0,
+    "24000/1001": 24000 / 1001,
+    "30000/1001": 30000 / 1001,
+    "60000/1001": 60000 / 1001,
+}
+
+
+class _ExtractionFailed(Exception):
+    """Raised inside cached extractors so failures aren't memoized."""
 
 
 def get_video_info(video_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Extract video metadata in-process with PyAV.
+    Falls back to ffprobe if PyAV can't read the file.
+    """
+    try:
+        with av.open(
+            video_path, metadata_errors="ignore", options=PROBE_OPTIONS
+        ) as container:
+            if not container.streams.video:
+                return None
+            return _container_info(container)
+    except (av.FFmpegError, OSError):
+        return _get_video_info_ffprobe(video_path)
+
+
+def _container_info(container: av.container.InputContainer) -> Dict[str, Any]:
+    """Build the get_video_info dict from an open container."""
+    video_stream = container.streams.video[0]
+
+    # r_frame_rate equivalent, as a Fraction (no string parsing)
+    rate = video_stream.base_rate or video_stream.average_rate
+    fps = float(rate) if rate else 24.0
+
+    duration = 0.0
+    if container.duration is not None:
+        duration = container.duration / av.time_base
+
+    return {
+        "duration": duration,
+        "width": video_stream.width,
+        "height": video_stream.height,
+        "fps": round(fps, 3),
+        "total_frames": int(duration * fps),
+        "codec": video_stream.codec_context.name,
+        "size": container.size,
+    }
+
+
+def _get_video_info_ffprobe(video_path: str) -> Optional[Dict[str, Any]]:
     """Extract video metadata using ffprobe."""
     cmd = [
-        "ffprobe",
+        FFPROBE,
+        "-probesize",
+        PROBE_SIZE,
+        "-analyzeduration",
+        PROBE_ANALYZE_DURATION,
         "-v",
         "quiet",
         "-print_format",
         "json",
-        "-show_format",
-        "-show_streams",
+        # Only query the fields we use, for the first video stream
+        "-select_streams",
+        "v:0",
+        "-show_entries",
+        "stream=codec_name,width,height,r_frame_rate:format=duration,size",
         video_path,
     ]
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+        result = subprocess.run(cmd, capture_output=True, timeout=30, close_fds=False)
         if result.returncode == 0:
-            data = json.loads(result.stdout)
-            video_stream = next(
-                (s for s in data.get("streams", []) if s["codec_type"] == "video"), None
-            )
+            data = orjson.loads(result.stdout)
+            video_stream = next(iter(data.get("streams") or []), None)
             if video_stream:
-                # Parse frame rate (can be "24/1" or "24000/1001" format)
-                fps_str = video_stream.get("r_frame_rate", "24/1")
-                try:
-                    if "/" in fps_str:
-                        num, den = fps_str.split("/")
-                        fps = float(num) / float(den)
-                    else:
-                        fps = float(fps_str)
-                except (ValueError, ZeroDivisionError):
-                    fps = 24.0
-
-                duration = float(data["format"].get("duration", 0))
+                fps = _parse_frame_rate(video_stream.get("r_frame_rate", "24/1"))
+
+                fmt = data.get("format") or {}
+                duration = float(fmt.get("duration") or 0)
                 return {
                     "duration": duration,
                     "width": video_stream.get("width"),
@@ -42,83 +149,661 @@ def get_video_info(video_path: str) -> Optional[Dict[str, Any]]:
                     "fps": round(fps, 3),
                     "total_frames": int(duration * fps),
                     "codec": video_stream.get("codec_name"),
-                    "size": int(data["format"].get("size", 0)),
+                    "size": int(fmt.get("size") or 0),
                 }
-    except (subprocess.TimeoutExpired, json.JSONDecodeError, KeyError):
+    except (OSError, subprocess.TimeoutExpired, orjson.JSONDecodeError):
         pass
     return None
 
 
+def _parse_frame_rate(fps_str: str) -> float:
+    """Parse a frame rate given as "24/1", "24000/1001" or "25"."""
+    fps = COMMON_FPS.get(fps_str)
+    if fps is not None:
+        return fps
+    try:
+        if "/" in fps_str:
+            num, den = fps_str.split("/")
+            return float(num) / float(den)
+        return float(fps_str)
+    except (ValueError, ZeroDivisionError):
+        return 24.0
+
+
+@lru_cache(maxsize=1)
+def _hwaccel_args() -> List[str]:
+    """Input arguments for hardware decoding, if FFmpeg supports it here."""
+    hwaccel = settings.ffmpeg_hwaccel.strip().lower()
+    if not hwaccel or hwaccel == "none":
+        return []
+
+    try:
+        result = subprocess.run(
+            [FFMPEG, "-hide_banner", "-hwaccels"],
+            capture_output=True,
+            text=True,
+            timeout=10,
+            close_fds=False,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return []
+
+    # Output is a header line followed by one method per line
+    methods = result.stdout.split()[3:] if result.returncode == 0 else []
+    if (hwaccel == "auto" and methods) or hwaccel in methods:
+        # FFmpeg falls back to software decoding if the device can't be opened
+        return ["-hwaccel", hwaccel]
+    return []
+
+
+def _seek_input_args(
+    video_path: str, timestamp: float, precise: bool = True
+) -> List[str]:
+    """Build input arguments that seek before opening the video."""
+    # -ss before -i seeks on the demuxer; FFmpeg still decodes accurately
+    # up to the timestamp from the nearest preceding keyframe, unless
+    # -noaccurate_seek asks for that keyframe itself
+    return [
+        *_hwaccel_args(),
+        "-ss",
+        f"{max(0.0, timestamp):.3f}",
+        *([] if precise else ["-noaccurate_seek"]),
+        "-i",
+        video_path,
+    ]
+
+
+class FrameExtractor:
+    """
+    Keeps a video open with PyAV so repeated seeks reuse the parsed
+    container and decoder instead of starting a new FFmpeg process.
+    """
+
+    def __init__(self, video_path: str):
+        # Same probe limits as get_video_info, so info() reports the same
+        self.container = av.open(
+            video_path, metadata_errors="ignore", options=PROBE_OPTIONS
+        )
+        if not self.container.streams.video:
+            self.container.close()
+            raise ValueError(f"No video stream in {video_path}")
+        self.stream = self.container.streams.video[0]
+        self.stream.thread_type = "AUTO"
+        self.lock = threading.Lock()
+
+        # Checkout bookkeeping, guarded by _extractors_lock: an extractor
+        # evicted from the LRU is only closed once its last user is done
+        self.users = 0
+        self.evicted = False
+
+        # FFmpeg's -ss is relative to the container start time
+        self.start_time = 0.0
+        if self.container.start_time is not None:
+            self.start_time = self.container.start_time / av.time_base
+
+    def extract(
+        self,
+        timestamp: float,
+        width: Optional[int] = None,
+        precise: bool = True,
+        scale_flags: str = "bicubic",
+    ) -> Optional[Image.Image]:
+        """
+        Decode the first frame at or after timestamp (seconds).
+        With precise=False the keyframe found by the seek is returned as is.
+        """
+        frame = self._decode(timestamp, width, precise, scale_flags)
+        return frame.to_image() if frame is not None else None
+
+    def extract_array(
+        self, timestamp: float, precise: bool = True
+    ) -> Optional[np.ndarray]:
+        """Decode a full-resolution frame as an HxWx3 uint8 RGB array."""
+        frame = self._decode(timestamp, None, precise, None)
+        return frame.to_ndarray(format="rgb24") if frame is not None else None
+
+    def _decode(
+        self,
+        timestamp: float,
+        width: Optional[int],
+        precise: bool,
+        scale_flags: Optional[str],
+    ) -> Optional[av.VideoFrame]:
+        target = self.start_time + max(0.0, timestamp)
+        # Compare in integer stream ticks: a float target sitting exactly on
+        # a frame can come out slightly above it and select the next frame
+        target_pts = round(target / self.stream.time_base)
+
+        with self.lock:
+            # Seek to the keyframe before the target, then decode forward
+            self.container.seek(target_pts, stream=self.stream)
+
+            found = None
+            for frame in self.container.decode(self.stream):
+                found = frame
+                if not precise:
+                    break
+                if frame.pts is not None and frame.pts >= target_pts:
+                    break
+
+            if found is not None and width:
+                height = max(1, round(width * found.height / found.width))
+                found = found.reformat(
+                    width=width,
+                    height=height,
+                    interpolation=(scale_flags or "bicubic").upper(),
+                )
+            return found
+
+    def info(self) -> Dict[str, Any]:
+        """Video metadata, in the same form as get_video_info."""
+        with self.lock:
+            return _container_info(self.container)
+
+    def close(self):
+        with self.lock:
+            self.container.close()
+
+
+_extractors: "OrderedDict[tuple, FrameExtractor]" = OrderedDict()
+_extractors_lock = threading.Lock()
+
+
+@contextmanager
+def get_frame_extractor(video_path: str) -> Iterator[FrameExtractor]:
+    """
+    Check out an open FrameExtractor for a video (kept in a small LRU).
+    The extractor stays open until the with block exits, even if it is
+    evicted by another thread in the meantime.
+    """
+    # Include mtime so a replaced file is reopened
+    key = (video_path, os.stat(video_path).st_mtime_ns)
+    with _extractors_lock:
+        extractor = _extractors.get(key)
+        if extractor is not None:
+            _extractors.move_to_end(key)
+            extractor.users += 1
+
+    if extractor is None:
+        # Open outside the lock so opening one video doesn't block the others
+        opened = FrameExtractor(video_path)
+        to_close = []
+        with _extractors_lock:
+            extractor = _extractors.get(key)
+            if extractor is None:
+                extractor = opened
+                _extractors[key] = extractor
+            else:
+                # Another thread opened it first
+                _extractors.move_to_end(key)
+                to_close.append(opened)
+            extractor.users += 1
+
+            while len(_extractors) > MAX_OPEN_EXTRACTORS:
+                old = _extractors.popitem(last=False)[1]
+                old.evicted = True
+                if not old.users:
+                    to_close.append(old)
+
+        for old in to_close:
+            old.close()
+
+    try:
+        yield extractor
+    finally:
+        with _extractors_lock:
+            extractor.users -= 1
+            release = extractor.evicted and not extractor.users
+        if release:
+            extractor.close()
+
+
+def _file_version(video_path: str) -> Optional[int]:
+    """Modification time used to invalidate cached frames of a video."""
+    try:
+        return os.stat(video_path).st_mtime_ns
+    except OSError:
+        return None
+
+
 def extract_frame(
-    video_path: str, timestamp: float, width: Optional[int] = None, quality: int = 85
+    video_path: str,
+    timestamp: float,
+    width: Optional[int] = None,
+    quality: int = 85,
+    precise: bool = True,
+    scale_flags: Optional[str] = None,
 ) -> Optional[bytes]:
     """
-    Extract a frame using two-pass seek for accuracy.
-    First seek gets close quickly, second seek is precise.
+    Extract a JPEG frame.
+    Uses a persistent PyAV decoder for the video, falling back to an
+    FFmpeg process if PyAV can't decode it. With precise=False the
+    nearest preceding keyframe is returned, skipping the decode up to
+    the exact timestamp. scale_flags picks the scaler (see _scale_flags).
+    Results are cached in memory per file version and timestamp (to 10ms).
     """
-    # Two-pass seek: fast seek to 1 second before, then precise seek
-    fast_seek = max(0, timestamp - 1.0)
-    precise_seek = timestamp - fast_seek
+    version = _file_version(video_path)
+    if version is None:
+        return None
+    try:
+        return _extract_frame_cached(
+            video_path,
+            version,
+            round(timestamp, 2),
+            width,
+            quality,
+            precise,
+            scale_flags or _scale_flags(quality),
+        )
+    except _ExtractionFailed:
+        return None
+
+
+@lru_cache(maxsize=FRAME_CACHE_SIZE)
+def _extract_frame_cached(
+    video_path: str,
+    version: int,
+    timestamp: float,
+    width: Optional[int],
+    quality: int,
+    precise: bool,
+    scale_flags: str,
+) -> bytes:
+    try:
+        with get_frame_extractor(video_path) as extractor:
+            image = extractor.extract(timestamp, width, precise, scale_flags)
+    except (av.FFmpegError, OSError, ValueError):
+        image = None
 
-    # Build FFmpeg command
+    if image is not None:
+        return _encode_jpeg(image, quality)
+
+    frame_data = _extract_frame_ffmpeg(
+        video_path, timestamp, width, quality, precise, scale_flags=scale_flags
+    )
+    if not frame_data:
+        raise _ExtractionFailed(video_path)
+    return frame_data
+
+
+def _extract_frame_ffmpeg(
+    video_path: str,
+    timestamp: float,
+    width: Optional[int] = None,
+    quality: int = 85,
+    precise: bool = True,
+    threads: Optional[int] = None,
+    scale_flags: Optional[str] = None,
+) -> Optional[bytes]:
+    """
+    Extract a frame using input seeking.
+    FFmpeg jumps to the keyframe before the timestamp and only decodes
+    from there, so seeks deep into long videos stay fast and accurate.
+    The frame is piped out uncompressed (PPM) and JPEG-encoded with Pillow.
+    """
     cmd = [
-        "ffmpeg",
-        "-ss",
-        str(fast_seek),  # Fast seek (before input)
-        "-i",
-        video_path,
-        "-ss",
-        str(precise_seek),  # Precise seek (after input)
+        FFMPEG,
+        *(["-threads", str(threads)] if threads else []),  # Decoder threads
+        *_seek_input_args(video_path, timestamp, precise),
+        *_frame_output_args(width, scale_flags or _scale_flags(quality)),
+    ]
+
+    output = _run_for_output(cmd, timeout=30, initial_size=FRAME_BUFFER_SIZE)
+    if not output:
+        return None
+
+    try:
+        image = Image.open(io.BytesIO(output))
+        return _encode_jpeg(image, quality)
+    except OSError:
+        return None
+
+
+@lru_cache(maxsize=32)
+def _frame_output_args(width: Optional[int], scale_flags: str) -> Tuple[str, ...]:
+    """
+    Output arguments for a single PPM frame on stdout.
+    They depend only on the output width and scaler, so each config is
+    built once and reused.
+    """
+    args = [
         "-frames:v",
         "1",
-        "-q:v",
-        str(max(1, min(31, (100 - quality) // 3))),  # Quality (1-31, lower is better)
+        # Keep the first decoded frame even if it precedes the seek point
+        "-fps_mode",
+        "passthrough",
     ]
 
     # Scale if width specified
     if width:
-        cmd.extend(["-vf", f"scale={width}:-1"])
+        args.extend(["-vf", f"scale={width}:-1:flags={scale_flags}"])
+
+    # PPM is raw RGB24 plus a small header carrying the scaled dimensions
+    args.extend(["-f", "image2pipe", "-vcodec", "ppm", "-y", "pipe:1"])
+    return tuple(args)
+
+
+def _scale_flags(quality: int) -> str:
+    """
+    Default scaler for a JPEG quality: fast_bilinear for low-quality
+    previews, lanczos when the output is meant to be sharp, otherwise
+    FFmpeg's own default (bicubic).
+    """
+    if quality < 50:
+        return "fast_bilinear"
+    if quality >= 90:
+        return "lanczos"
+    return "bicubic"
+
 
-    cmd.extend(["-f", "image2pipe", "-vcodec", "mjpeg", "-y", "pipe:1"])
+def _encode_jpeg(image: Image.Image, quality: int) -> bytes:
+    """Encode an image as JPEG (Pillow uses libjpeg-turbo)."""
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=quality)
+    return buffer.getvalue()
 
+
+def extract_frames_parallel(
+    video_path: str,
+    timestamps: List[float],
+    width: Optional[int] = None,
+    quality: int = 85,
+    precise: bool = True,
+    max_workers: Optional[int] = None,
+    scale_flags: Optional[str] = None,
+) -> List[Optional[bytes]]:
+    """
+    Extract frames with one FFmpeg process per timestamp, run concurrently.
+    Results are in timestamp order, with None for failed extractions.
+    """
+    if not timestamps:
+        return []
+
+    workers = min(len(timestamps), max_workers or os.cpu_count() or 4)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Two decoder threads per process avoids oversubscribing the CPU
+        return list(
+            executor.map(
+                lambda t: _extract_frame_ffmpeg(
+                    video_path,
+                    t,
+                    width,
+                    quality,
+                    precise,
+                    threads=2,
+                    scale_flags=scale_flags,
+                ),
+                timestamps,
+            )
+        )
+
+
+def extract_frame_high_quality(
+    video_path: str, timestamp: float, precise: bool = True
+) -> Optional[bytes]:
+    """Extract a high-quality PNG frame (encoded from the cached pixels)."""
+    pixels = extract_frame_array(video_path, timestamp, precise)
+    if pixels is None:
+        return None
+
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, "PNG", compress_level=1)
+    return buffer.getvalue()
+
+
+def extract_frame_array(
+    video_path: str, timestamp: float, precise: bool = True
+) -> Optional[np.ndarray]:
+    """
+    Extract a full-resolution frame as a read-only HxWx3 uint8 RGB array.
+    Decodes in-process with PyAV, falling back to an FFmpeg process if
+    PyAV can't decode the video; both pick the first frame at or after the
+    timestamp, as FFmpeg's accurate -ss does. Decoded pixels are cached in
+    memory per file version and timestamp (to 10ms), so reuse needs no
+    image decode.
+    """
+    version = _file_version(video_path)
+    if version is None:
+        return None
     try:
-        result = subprocess.run(cmd, capture_output=True, timeout=30)
-        if result.returncode == 0 and result.stdout:
-            return result.stdout
-    except subprocess.TimeoutExpired:
-        pass
+        return _extract_frame_array_cached(
+            video_path, version, round(timestamp, 2), precise
+        )
+    except _ExtractionFailed:
+        return None
 
-    return None
 
+@lru_cache(maxsize=FULL_FRAME_CACHE_SIZE)
+def _extract_frame_array_cached(
+    video_path: str, version: int, timestamp: float, precise: bool
+) -> np.ndarray:
+    try:
+        with get_frame_extractor(video_path) as extractor:
+            pixels = extractor.extract_array(timestamp, precise)
+    except (av.FFmpegError, OSError, ValueError):
+        pixels = None
+
+    if pixels is None:
+        pixels = _extract_frame_array_ffmpeg(video_path, timestamp, precise)
 
-def extract_frame_high_quality(video_path: str, timestamp: float) -> Optional[bytes]:
-    """Extract a high-quality PNG frame for final poster generation."""
-    fast_seek = max(0, timestamp - 1.0)
-    precise_seek = timestamp - fast_seek
+    # Shared between callers through the cache
+    pixels.flags.writeable = False
+    return pixels
 
+
+def _extract_frame_array_ffmpeg(
+    video_path: str, timestamp: float, precise: bool
+) -> np.ndarray:
     cmd = [
-        "ffmpeg",
-        "-ss",
-        str(fast_seek),
-        "-i",
-        video_path,
-        "-ss",
-        str(precise_seek),
+        FFMPEG,
+        *_seek_input_args(video_path, timestamp, precise),
         "-frames:v",
         "1",
+        # Keep the first decoded frame even if it precedes the seek point
+        "-fps_mode",
+        "passthrough",
+        # Uncompressed RGB24 (PPM), so there is no PNG encode/decode round trip
         "-f",
         "image2pipe",
         "-vcodec",
-        "png",
+        "ppm",
         "-y",
-        "pipe:1",
     ]
 
+    output = _run_for_shared_output(cmd, timeout=60)
+    if output is None:
+        raise _ExtractionFailed(video_path)
+
+    with output:
+        header = PPM_HEADER.match(output)
+        if header is None or header.group(3) != b"255":
+            raise _ExtractionFailed(video_path)
+        width, height = int(header.group(1)), int(header.group(2))
+        if len(output) - header.end() < width * height * 3:
+            raise _ExtractionFailed(video_path)
+
+        # Single copy out of the mapping into the cached array
+        view = np.frombuffer(
+            output, dtype=np.uint8, count=width * height * 3, offset=header.end()
+        )
+        pixels = view.reshape(height, width, 3).copy()
+        del view
+
+    return pixels
+
+
+def extract_frames_batch(
+    video_path: str,
+    timestamps: List[float],
+    width: Optional[int] = None,
+    quality: int = 85,
+    precise: bool = True,
+    scale_flags: Optional[str] = None,
+) -> Optional[List[bytes]]:
+    """
+    Extract several frames with as few FFmpeg processes as possible.
+    Returns None unless every requested frame was extracted.
+    """
+    frames = []
+    for start in range(0, len(timestamps), BATCH_MAX_INPUTS):
+        chunk = _extract_frames_single_run(
+            video_path,
+            timestamps[start : start + BATCH_MAX_INPUTS],
+            width,
+            quality,
+            precise,
+            scale_flags or _scale_flags(quality),
+        )
+        if chunk is None:
+            return None
+        frames.extend(chunk)
+    return frames
+
+
+def _extract_frames_single_run(
+    video_path: str,
+    timestamps: List[float],
+    width: Optional[int],
+    quality: int,
+    precise: bool,
+    scale_flags: str,
+) -> Optional[List[bytes]]:
+    """
+    Extract several frames with a single FFmpeg process.
+    Each timestamp is opened as its own input-seeked stream and the first
+    frame of each is concatenated into one MJPEG stream on stdout.
+    """
+    cmd = [FFMPEG]
+    for timestamp in timestamps:
+        cmd.extend(_seek_input_args(video_path, timestamp, precise))
+
+    # Take one frame from each input, then join them into a single stream
+    graph = ";".join(
+        f"[{i}:v:0]trim=end_frame=1,setpts=PTS-STARTPTS[v{i}]"
+        for i in range(len(timestamps))
+    )
+    graph += ";" + "".join(f"[v{i}]" for i in range(len(timestamps)))
+    # Single-frame segments have no duration, so renumber timestamps after concat
+    graph += f"concat=n={len(timestamps)}:v=1:a=0,setpts=N/TB"
+    if width:
+        graph += f",scale={width}:-1:flags={scale_flags}"
+    graph += "[out]"
+
+    cmd.extend(
+        [
+            "-filter_complex",
+            graph,
+            "-map",
+            "[out]",
+            "-fps_mode",
+            "passthrough",
+            "-q:v",
+            str(max(1, min(31, (100 - quality) // 3))),
+            "-f",
+            "image2pipe",
+            "-vcodec",
+            "mjpeg",
+            "-y",
+            "pipe:1",
+        ]
+    )
+
+    output = _run_for_output(cmd, timeout=60)
+    if output:
+        frames = _split_jpeg_stream(output)
+        if len(frames) == len(timestamps):
+            return frames
+
+    return None
+
+
+def _run_for_shared_output(cmd: List[str], timeout: float) -> Optional[mmap.mmap]:
+    """
+    Run FFmpeg with a RAM-backed file (in /dev/shm) appended as its output
+    and return the file memory-mapped, or None on failure or timeout.
+    Large frames are written once by FFmpeg and read in place, instead of
+    being copied through a pipe into a growing buffer.
+    """
+    fd, path = tempfile.mkstemp(suffix=".out", dir=SHM_DIR)
     try:
-        result = subprocess.run(cmd, capture_output=True, timeout=60)
-        if result.returncode == 0 and result.stdout:
-            return result.stdout
-    except subprocess.TimeoutExpired:
-        pass
+        try:
+            result = subprocess.run(
+                [*cmd, path],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=timeout,
+                close_fds=False,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+
+        if result.returncode != 0 or os.fstat(fd).st_size == 0:
+            return None
+        # The mapping stays valid after the file is closed and unlinked
+        return mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    finally:
+        os.close(fd)
+        os.unlink(path)
 
+
+def _run_for_output(
+    cmd: List[str], timeout: float, initial_size: int = JPEG_BUFFER_SIZE
+) -> Optional[bytes]:
+    """
+    Run FFmpeg and return its stdout, or None on failure or timeout.
+    Output is read straight into a preallocated buffer instead of being
+    accumulated as a list of chunks.
+    """
+    try:
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=PIPE_BUFFER_SIZE,
+            close_fds=False,
+        )
+    except OSError:
+        return None
+
+    # Larger kernel pipe buffer means fewer reads for multi-MB frames (Linux)
+    if hasattr(fcntl, "F_SETPIPE_SZ"):
+        try:
+            fcntl.fcntl(process.stdout, fcntl.F_SETPIPE_SZ, PIPE_BUFFER_SIZE)
+        except OSError:
+            pass
+
+    timer = threading.Timer(timeout, process.kill)
+    timer.start()
+    try:
+        buffer = bytearray(initial_size)
+        size = 0
+        with process.stdout:
+            while True:
+                if size == len(buffer):
+                    buffer.extend(bytes(len(buffer)))
+                count = process.stdout.readinto(memoryview(buffer)[size:])
+                if not count:
+                    break
+                size += count
+        process.wait()
+    finally:
+        timer.cancel()
+
+    if process.returncode == 0 and size:
+        return bytes(memoryview(buffer)[:size])
     return None
+
+
+def _split_jpeg_stream(data: bytes) -> List[bytes]:
+    """Split concatenated MJPEG output into individual JPEG images."""
+    # 0xFF bytes are stuffed inside JPEG entropy-coded data, so SOI/EOI
+    # markers only appear at image boundaries
+    frames = []
+    start = data.find(JPEG_SOI)
+    while start != -1:
+        end = data.find(JPEG_EOI, start + 2)
+        if end == -1:
+            break
+        frames.append(data[start : end + 2])
+        start = data.find(JPEG_SOI, end + 2)
+    return frames
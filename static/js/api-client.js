@@ -46,9 +46,25 @@ class ApiClient {
         url.searchParams.set('base', base);
         url.searchParams.set('path', path);
         url.searchParams.set('count', count.toString());
+        url.searchParams.set('format', 'binary');
         const response = await fetch(url);
         if (!response.ok) throw new Error('Failed to get thumbnails');
-        return response.json();
+
+        // Header: uint32 count, float64 duration; then length-prefixed JPEGs
+        const buffer = await response.arrayBuffer();
+        const view = new DataView(buffer);
+        const thumbCount = view.getUint32(0, true);
+        const duration = view.getFloat64(4, true);
+        const thumbnails = [];
+        let offset = 12;
+        for (let i = 0; i < thumbCount; i++) {
+            const length = view.getUint32(offset, true);
+            offset += 4;
+            const blob = new Blob([buffer.slice(offset, offset + length)], { type: 'image/jpeg' });
+            thumbnails.push(URL.createObjectURL(blob));
+            offset += length;
+        }
+        return { count: thumbCount, duration, thumbnails };
     }
 
     async generatePoster(posterData) {
@@ -73,6 +73,7 @@ class FrameSlider {
 
         try {
             const data = await api.getThumbnails(base, path, 15);
+            this.thumbnails.forEach((thumb) => URL.revokeObjectURL(thumb));
             this.thumbnails = data.thumbnails;
             this._renderThumbnails();
         } catch (error) {
@@ -88,7 +89,7 @@ class FrameSlider {
 
         this.thumbnails.forEach((thumb, index) => {
             const img = document.createElement('img');
-            img.src = `data:image/jpeg;base64,${thumb}`;
+            img.src = thumb;
             img.alt = `Frame ${index + 1}`;
             img.title = this._formatTime(index * interval);
             img.addEventListener('click', () => {